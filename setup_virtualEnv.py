@@ -1,24 +1,37 @@
-import os
-import subprocess
-import sys
-
-def create_virtual_env(venv_name=".venv"):
-    print(f"🔧 Creating virtual environment: {venv_name}")
-    subprocess.run([sys.executable, "-m", "venv", venv_name], check=True)
-
-    # Determine correct pip path
-    if os.name == 'nt':
-        pip_path = os.path.join(venv_name, "Scripts", "pip.exe")
-        activate_cmd = f"{venv_name}\\Scripts\\activate"
-    else:
-        pip_path = os.path.join(venv_name, "bin", "pip")
-        activate_cmd = f"source {venv_name}/bin/activate"
-
-    print("📦 Installing dependencies from requirements.txt...")
-    subprocess.run([pip_path, "install", "-r", "requirements.txt"], check=True)
-
-    print(f"\n✅ Setup complete!")
-    print(f"👉 To activate your environment, run:\n\n    {activate_cmd}\n")
-
-if __name__ == "__main__":
-    create_virtual_env()
+import os
+import subprocess
+import sys
+import sysconfig
+
+def create_virtual_env(venv_name=".venv"):
+    print(f"🔧 Creating virtual environment: {venv_name}")
+    subprocess.run([sys.executable, "-m", "venv", venv_name], check=True)
+
+    # Resolve the venv's scripts directory via sysconfig instead of
+    # hand-building Scripts/pip.exe vs bin/pip per platform
+    scripts_dir = sysconfig.get_path("scripts", vars={"base": venv_name, "platbase": venv_name})
+    pip_path = os.path.join(scripts_dir, "pip")
+    activate_path = os.path.join(scripts_dir, "activate")
+    activate_cmd = activate_path if os.name == 'nt' else f"source {activate_path}"
+
+    print("📦 Installing dependencies from requirements.txt...")
+    python_path = os.path.join(scripts_dir, "python")
+    try:
+        # uv downloads and installs wheels in parallel, which makes repeat
+        # environment builds far faster than plain pip
+        subprocess.run([python_path, "-m", "pip", "install", "-q",
+                        "--disable-pip-version-check", "--no-input", "uv"], check=True)
+        subprocess.run([python_path, "-m", "uv", "pip", "install",
+                        "-r", "requirements.txt"], check=True)
+    except subprocess.CalledProcessError:
+        # Fall back to plain pip, skipping install-time bytecode compilation
+        # and the version self-check
+        subprocess.run([pip_path, "install", "--no-compile",
+                        "--disable-pip-version-check", "--no-input",
+                        "-r", "requirements.txt"], check=True)
+
+    print(f"\n✅ Setup complete!")
+    print(f"👉 To activate your environment, run:\n\n    {activate_cmd}\n")
+
+if __name__ == "__main__":
+    create_virtual_env()